@@ -1,73 +1,318 @@
 import dash
 from dash import dcc, html, Input, Output, State
 import pandas as pd
-import json
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from numba import njit, prange
+# orjson is also picked up by Dash (via plotly.io.json) to serialize callback responses
+import orjson
 import os
 import re
 import base64
 import io
+import tempfile
+import threading
 from dash import callback_context
+from flask import Response
 from dash_ag_grid import AgGrid
 from dash import dash_table
 
 import logging
 from dash import Dash
 
-# Set the overall logging level to DEBUG
-logging.basicConfig(level=logging.DEBUG)
+# TDS_ENV=prod turns off DEBUG logging and Dash debug mode (reloader, dev tools)
+IS_PROD = os.getenv('TDS_ENV') == 'prod'
 
-# Optionally, silence the extensive 'POST /dash/_dash-update-component' messages
-logging.getLogger('tds-ai').setLevel(logging.DEBUG) # set to ERROR to hide request logs
+# Set the overall logging level to DEBUG (INFO in production)
+logging.basicConfig(level=logging.INFO if IS_PROD else logging.DEBUG)
+
+# Silence the extensive 'POST /_dash-update-component' request logs
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
+# numba dumps bytecode and IR at DEBUG while compiling the interest kernel
+logging.getLogger('numba').setLevel(logging.WARNING)
 
 
 data_dir = 'data'
-clients_file = os.path.join(data_dir, 'clients.csv')
+clients_file = os.path.join(data_dir, 'clients.parquet')
 sections_file = os.path.join(data_dir, 'sections.json')
-transactions_file = os.path.join(data_dir, 'transactions.csv')
+transactions_file = os.path.join(data_dir, 'transactions.parquet')
+# Legacy CSV stores, migrated to parquet on first load
+clients_csv = os.path.join(data_dir, 'clients.csv')
+transactions_csv = os.path.join(data_dir, 'transactions.csv')
 
 # PAN validation regex (case-insensitive)
 PAN_REGEX = re.compile(r'^[A-Z]{5}[0-9]{4}[A-Z]$', re.IGNORECASE)
 
+TRANSACTION_COLUMNS = [
+    'transaction_id', 'client_name', 'principal_amount', 'tax_code_section',
+    'date_of_transaction', 'date_of_tax_deduction', 'date_of_tax_payment'
+]
+# Explicit dtypes for uploads so the parser skips type inference
+TRANSACTION_DTYPES = {col: 'string' for col in TRANSACTION_COLUMNS}
+TRANSACTION_DTYPES['principal_amount'] = 'float64'
+UPLOAD_CHUNK_SIZE = 100_000
+EXPORT_CHUNK_SIZE = 50_000
+# On-disk schema: every column is text except the amount
+TRANSACTION_SCHEMA = pa.schema([
+    (col, pa.float64() if col == 'principal_amount' else pa.string()) for col in TRANSACTION_COLUMNS
+])
+
 # Load static section mapping
-with open(sections_file, 'r') as f:
-    SECTION_MAP = json.load(f)
+with open(sections_file, 'rb') as f:
+    SECTION_MAP = orjson.loads(f.read())
+
+# Canonical section -> rate lookup for vectorized .map(); SECTION_MAP itself only feeds the grid dropdown
+SECTION_RATES = pd.Series({k.strip(): float(v) for k, v in SECTION_MAP.items()}, dtype='float64')
 
 app = dash.Dash(__name__)
 app.title = 'TDS Deduction Report Engine'
 
+# TDS_PROFILE=1 prints a cProfile summary for every request
+if os.getenv('TDS_PROFILE') == '1':
+    from werkzeug.middleware.profiler import ProfilerMiddleware
+    app.server.wsgi_app = ProfilerMiddleware(app.server.wsgi_app)
+
 # Helper functions
 
+# Parsed data files keyed by path -> (mtime, DataFrame, derived values); entries are dropped on save
+_file_cache = {}
+
+# Latest finished report only: {(start_date, end_date, period, transactions mtime): (records, columns)}
+_report_cache = {}
+
+# Serializes read-modify-write of the transactions file across the server's request threads
+_transactions_lock = threading.RLock()
+
+def _cache_entry(path):
+    mtime = os.path.getmtime(path)
+    entry = _file_cache.get(path)
+    if entry is None or entry[0] != mtime:
+        logging.info(f'Loading {path}')
+        # Ignore the stored pandas dtypes so text columns load as plain strings rather than NA-backed ones
+        entry = (mtime, pq.read_table(path).to_pandas(ignore_metadata=True), {})
+        _file_cache[path] = entry
+    return entry
+
+def _cached_read(path):
+    # Shallow copy so callers can add columns/rows without touching the cached frame
+    return _cache_entry(path)[1].copy(deep=False)
+
+def _cached_derived(path, name, build):
+    # Value computed once from the cached frame and reused until the file changes
+    mtime, df, derived = _cache_entry(path)
+    if name not in derived:
+        derived[name] = build(df)
+    return derived[name]
+
+def _invalidate(path):
+    _file_cache.pop(path, None)
+    if path == transactions_file:
+        _report_cache.clear()
+
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
 def load_clients():
+    if not os.path.exists(clients_file) and os.path.exists(clients_csv):
+        save_clients(pd.read_csv(clients_csv, engine='pyarrow', dtype_backend='pyarrow'))
     if os.path.exists(clients_file):
-        logging.info(f'Loading clients from {clients_file}')
-        return pd.read_csv(clients_file)
+        return _cached_read(clients_file)
     return pd.DataFrame(columns=['client_name', 'PAN', 'address'])
 
+def load_client_pans():
+    if os.path.exists(clients_file):
+        return _cached_derived(clients_file, 'pans', lambda df: set(df['PAN'].dropna().str.upper()))
+    return set()
+
 def save_clients(df):
     logging.info(f'Saving clients to {clients_file}')
-    df.to_csv(clients_file, index=False)
+    df.astype('string').to_parquet(clients_file, engine='pyarrow', compression='snappy', index=False)
+    _invalidate(clients_file)
+
+def _to_transaction_table(df):
+    # Grid rows mix strings and numbers per column; coerce them to the on-disk schema
+    df = df.reindex(columns=TRANSACTION_COLUMNS).astype('string')
+    df['principal_amount'] = pd.to_numeric(df['principal_amount'], errors='coerce')
+    return pa.Table.from_pandas(df, schema=TRANSACTION_SCHEMA, preserve_index=False)
+
+def _migrate_transactions_csv():
+    if not os.path.exists(transactions_file) and os.path.exists(transactions_csv):
+        # Read every column as text so pyarrow does not turn ISO dates into date32/timestamps
+        save_transactions(pd.read_csv(transactions_csv, engine='pyarrow', dtype='string[pyarrow]'))
 
 def load_transactions():
+    _migrate_transactions_csv()
     if os.path.exists(transactions_file):
-        logging.info(f'Loading transactions from {transactions_file}')
-        return pd.read_csv(transactions_file)
-    return pd.DataFrame(columns=[
-        'transaction_id', 'client_name', 'principal_amount', 'tax_code_section',
-        'date_of_transaction', 'date_of_tax_deduction', 'date_of_tax_payment'
-    ])
+        return _cached_read(transactions_file)
+    return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+def _derive_transactions(name, build):
+    df = load_transactions()  # also migrates the legacy CSV on first use
+    if os.path.exists(transactions_file):
+        return _cached_derived(transactions_file, name, build)
+    return build(df)
+
+def load_transaction_ids():
+    return _derive_transactions('ids', lambda df: set(df['transaction_id'].dropna().astype(str)))
 
 def save_transactions(df):
     logging.info(f'Saving transactions to {transactions_file}')
-    df.to_csv(transactions_file, index=False)
+    with _transactions_lock:
+        pq.write_table(_to_transaction_table(df), transactions_file, compression='snappy')
+        _invalidate(transactions_file)
+
+def append_transactions(frames):
+    """Rewrite the transactions file batch by batch with each frame in frames added at the end."""
+    logging.info(f'Appending transactions to {transactions_file}')
+    with _transactions_lock:
+        # Unique temp file next to the target so os.replace stays on one filesystem
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(transactions_file), suffix='.parquet')
+        os.close(fd)
+        try:
+            with pq.ParquetWriter(tmp_file, TRANSACTION_SCHEMA, compression='snappy') as writer:
+                if os.path.exists(transactions_file):
+                    for batch in pq.ParquetFile(transactions_file).iter_batches():
+                        writer.write_batch(batch)
+                for df in frames:
+                    writer.write_table(_to_transaction_table(df))
+            os.replace(tmp_file, transactions_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        _invalidate(transactions_file)
+
+def import_transactions(data):
+    """Append rows from uploaded CSV bytes whose transaction_id is not stored yet; returns an error message or ''."""
+    try:
+        header = pd.read_csv(io.BytesIO(data), nrows=0)
+    except Exception as e:
+        return f'Error reading file: {e}'
+    if not set(header.columns) >= set(TRANSACTION_COLUMNS):
+        return 'Missing required columns.'
+    # Stream the upload in chunks so peak memory stays bounded for large files
+    def new_rows(reader):
+        for chunk in reader:
+            ids = chunk['transaction_id'].astype('string')
+            # Repeats inside the chunk count too, so the result does not depend on chunk boundaries
+            mask = ~ids.isin(existing_ids) & ~(ids.duplicated() & ids.notna())
+            existing_ids.update(ids[mask].dropna())
+            yield chunk[mask]
+    # Held from reading ids to the append so a concurrent upload cannot add the same ids
+    with _transactions_lock:
+        # Copy: ids from this upload are added as chunks stream through
+        existing_ids = set(load_transaction_ids())
+        try:
+            with pd.read_csv(io.BytesIO(data), usecols=TRANSACTION_COLUMNS, dtype=TRANSACTION_DTYPES,
+                             engine='c', chunksize=UPLOAD_CHUNK_SIZE) as reader:
+                append_transactions(new_rows(reader))
+        except Exception as e:
+            return f'Error reading file: {e}'
+    return ''
+
+def apply_transaction_edits(edits):
+    """Save {row index: {column: value}} grid edits into the transactions store."""
+    with _transactions_lock:
+        df = load_transactions().astype(object)
+        for row_index, changes in edits.items():
+            row = int(row_index)
+            # A stale index would otherwise make df.at append a new empty row
+            if not 0 <= row < len(df):
+                raise IndexError(f'row {row} no longer exists')
+            for col, value in changes.items():
+                df.at[row, col] = value
+        save_transactions(df)
 
 def validate_pan(pan, existing_pans=None):
     pan = pan.upper()
     if not PAN_REGEX.match(pan):
         return False, 'Invalid PAN format.'
-    if existing_pans is not None and pan in [p.upper() for p in existing_pans]:
+    if existing_pans is not None and pan in existing_pans:
         return False, 'Duplicate PAN.'
     return True, ''
 
+def _parse_dates(series):
+    # Fixed ISO format keeps pandas on its C parser; cache=True parses each distinct date once
+    return pd.to_datetime(series.astype(str).str.slice(0, 10), format='%Y-%m-%d', errors='coerce', cache=True)
+
+# Deadline month and year offset indexed by transaction month - 1 (December rolls into January)
+_DEADLINE_MONTH = np.array([2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 1], dtype=np.int8)
+_DEADLINE_YOFF = np.array([0] * 11 + [1], dtype=np.int8)
+
+def _date_parts(dt):
+    # (year, month, day) as int32 arrays; NaT rows become 0 and are masked out by the caller
+    return tuple(part.fillna(0).to_numpy(dtype=np.int32) for part in (dt.dt.year, dt.dt.month, dt.dt.day))
+
+def _ordinal(year, month, day):
+    # Order-preserving day number (31-day months) so date comparisons are one integer compare
+    return year * 372 + month * 31 + day
+
+@njit(parallel=True, cache=True)
+def _interest_kernel(tds, valid, deadline, april_30, year_end, m_trans, m_deduct, m_pay, pay):
+    out = np.zeros_like(tds)
+    for i in prange(len(tds)):
+        if not valid[i] or pay[i] <= deadline[i]:
+            continue
+        # Special case: year-end deduction moves to 1 April of the next year
+        if year_end[i]:
+            # If paid before Apr 30, April interest is waived
+            if pay[i] <= april_30[i]:
+                interest = tds[i] * 0.01 * 2
+            else:
+                # m_deduct + 13 is April of the following year
+                months_15 = m_pay[i] - (m_deduct[i] + 13) + 1
+                interest = tds[i] * 0.01 * 2 + tds[i] * 0.015 * months_15
+        else:
+            # Months at 1%: from transaction month to month before deduction
+            months_1 = max(m_deduct[i] - m_trans[i], 0)
+            # Months at 1.5%: from deduction month to payment month
+            months_15 = max(m_pay[i] - m_deduct[i] + 1, 0)
+            interest = tds[i] * 0.01 * months_1 + tds[i] * 0.015 * months_15
+        out[i] = interest
+    return out
+
+def calc_tds_interest(df):
+    """Return (tds, interest) arrays for every row of a transactions frame."""
+    # Strip and look up each distinct section once, then gather rates by code
+    codes, sections = pd.factorize(df['tax_code_section'].astype(str))
+    rate = SECTION_RATES.reindex(sections.str.strip()).fillna(0.0).to_numpy(dtype=np.float64)[codes]
+    # Blank or non-numeric amounts count as zero rather than turning TDS and totals into NaN
+    principal = pd.to_numeric(df['principal_amount'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+    tds = principal * rate
+
+    dt_trans = _parse_dates(df['date_of_transaction'])
+    dt_deduct = _parse_dates(df['date_of_tax_deduction'])
+    dt_pay = _parse_dates(df['date_of_tax_payment'])
+    valid = (dt_trans.notna() & dt_deduct.notna() & dt_pay.notna()).to_numpy()
+    ty, tm, _ = _date_parts(dt_trans)
+    dy, dm, dd = _date_parts(dt_deduct)
+    py, pm, pday = _date_parts(dt_pay)
+    # Deadline: 7th of next month after transaction
+    deadline = _ordinal(ty + _DEADLINE_YOFF[tm - 1], _DEADLINE_MONTH[tm - 1].astype(np.int32), 7)
+    # Year-end deductions (31 March) are measured against 30 April of the following year
+    year_end = (dm == 3) & (dd == 31)
+    april_30 = _ordinal(dy + 1, 4, 30)
+    # Months since year 0, so month spans are plain subtractions in the kernel
+    m_trans, m_deduct, m_pay = ty * 12 + tm, dy * 12 + dm, py * 12 + pm
+    interest = _interest_kernel(tds, valid, deadline, april_30, year_end, m_trans, m_deduct, m_pay, _ordinal(py, pm, pday))
+    rounded = np.round(interest, 2)
+    # np.round scales by 100 first and can drift a cent on half-cent values; Python's round() decides those exactly
+    halves = np.flatnonzero(np.abs((interest * 100) % 1 - 0.5) < 1e-6)
+    rounded[halves] = [round(v, 2) for v in interest[halves].tolist()]
+    return tds, rounded
+
+def _add_tds_interest(df):
+    df = df.copy(deep=False)
+    tds, interest = calc_tds_interest(df)
+    df['TDS'] = tds
+    df['Interest'] = interest
+    df['Total Payment'] = df['TDS'] + df['Interest']
+    return df
+
+def load_transaction_report():
+    # Computed once per transactions file version; report queries only filter it
+    return _derive_transactions('report', _add_tds_interest)
+
 # Layout
 app.layout = html.Div([
     dcc.Tabs([
@@ -113,9 +358,8 @@ app.layout = html.Div([
                         'field': 'client_name',
                         'editable': True,
                         'cellEditor': 'agSelectCellEditor',
-                        'cellEditorParams': {
-                            'values': list(load_clients()['client_name'].dropna().unique())
-                        }
+                        # Filled from the clients table by update_client_options
+                        'cellEditorParams': {'values': []}
                     },
 
                     {'headerName': 'Principal Amount', 'field': 'principal_amount', 'editable': True, 'type': 'numericColumn'},
@@ -156,13 +400,16 @@ app.layout = html.Div([
 
                 ],
 
-                rowData=[],
+                # Rows are paged in from the server by serve_transaction_rows
+                rowModelType='infinite',
 
-                defaultColDef={'flex': 1, 'minWidth': 120, 'resizable': True},
+                # Sorting is off so grid row indexes match storage order for saved edits
+                defaultColDef={'flex': 1, 'minWidth': 120, 'resizable': True, 'sortable': False},
 
                 dashGridOptions={
                     'rowSelection': 'multiple',
-                    'stopEditingWhenCellsLoseFocus': True
+                    'stopEditingWhenCellsLoseFocus': True,
+                    'cacheBlockSize': 100
                 },
 
                 style={'height': '400px', 'width': '100%'},
@@ -170,6 +417,10 @@ app.layout = html.Div([
             html.Button('Add Row', id='add-transaction-row'),
             html.Button('Save Transactions', id='save-transactions'),
             html.Div(id='transactions-save-status', style={'color': 'green'}),
+            # Bumped whenever rows are appended on the server so the grid re-fetches
+            dcc.Store(id='transactions-version', data=0),
+            # Unsaved cell edits: {row index: {column: value}}
+            dcc.Store(id='transactions-edits', data={}),
         ]),
         dcc.Tab(label='Reports', children=[
             html.H3('TDS Reports'),
@@ -222,12 +473,11 @@ def manage_clients(ts, add_clicks, name, pan, address, current_data):
             address = str(address or '').strip()
             if not name or not pan or not address:
                 errors.append('All fields are required.')
-            valid, msg = validate_pan(pan, df['PAN'].str.upper() if not df.empty else [])
+            valid, msg = validate_pan(pan, load_client_pans())
             if not valid:
                 errors.append(msg)
             if not errors:
-                new_row = {'client_name': name, 'PAN': pan, 'address': address}
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+                df.loc[len(df)] = {'client_name': name, 'PAN': pan, 'address': address}
                 save_clients(df)
                 status_message = 'Client added successfully.'
             else:
@@ -237,51 +487,74 @@ def manage_clients(ts, add_clicks, name, pan, address, current_data):
 
 # --- TRANSACTIONS TAB CALLBACKS ---
 @app.callback(
-    Output('transactions-table', 'rowData'),
+    Output('transactions-table', 'columnDefs'),
+    Input('clients-table', 'data'),
+    State('transactions-table', 'columnDefs'),
+)
+def update_client_options(clients, column_defs):
+    names = list(dict.fromkeys(row['client_name'] for row in clients or [] if row.get('client_name')))
+    for col in column_defs:
+        if col.get('field') == 'client_name':
+            col['cellEditorParams'] = {'values': names}
+    return column_defs
+
+@app.callback(
+    Output('transactions-table', 'getRowsResponse'),
+    Input('transactions-table', 'getRowsRequest'),
+    prevent_initial_call=True
+)
+def serve_transaction_rows(request):
+    if not request:
+        return dash.no_update
+    df = load_transactions()
+    start, end = request['startRow'], request['endRow']
+    return {'rowData': df.iloc[start:end].to_dict('records'), 'rowCount': len(df)}
+
+@app.callback(
+    Output('transactions-version', 'data'),
     Output('upload-transactions-error', 'children'),
     Input('upload-transactions', 'contents'),
     Input('add-transaction-row', 'n_clicks'),
     State('upload-transactions', 'filename'),
-    State('transactions-table', 'rowData'),
+    State('transactions-version', 'data'),
+    State('transactions-edits', 'data'),
     prevent_initial_call=True
 )
-def update_transactions_table(upload_contents, add_row_clicks, upload_filename, current_rowData):
+def update_transactions_table(upload_contents, add_row_clicks, upload_filename, version, edits):
     ctx = callback_context
     error_msg = ''
-    df = load_transactions()
     if ctx.triggered:
         trigger = ctx.triggered[0]['prop_id'].split('.')[0]
-        if trigger == 'upload-transactions' and upload_contents:
-            content_type, content_string = upload_contents.split(',')
-            decoded = base64.b64decode(content_string)
+        if edits:
+            # Save pending grid edits first; appends only add rows at the end, so their row indexes stay valid
             try:
-                df_new = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+                apply_transaction_edits(edits)
             except Exception as e:
-                error_msg = f'Error reading file: {e}'
-                return current_rowData, error_msg
-            required = {'transaction_id', 'client_name', 'principal_amount', 'tax_code_section', 'date_of_transaction', 'date_of_tax_deduction', 'date_of_tax_payment'}
-            if not required.issubset(df_new.columns):
-                error_msg = 'Missing required columns.'
-                return current_rowData, error_msg
-            df_existing = load_transactions()
-            df_valid = df_new[~df_new['transaction_id'].isin(df_existing['transaction_id'])]
-            df_all = pd.concat([df_existing, df_valid], ignore_index=True)
-            save_transactions(df_all)
-            return df_all.to_dict('records'), error_msg
+                return dash.no_update, f'Error saving transactions: {e}'
+        if trigger == 'upload-transactions' and upload_contents:
+            content_type, content_string = upload_contents.split(',')
+            error_msg = import_transactions(base64.b64decode(content_string))
+            if error_msg:
+                return dash.no_update, error_msg
+            return (version or 0) + 1, error_msg
         elif trigger == 'add-transaction-row':
-            if current_rowData is None:
-                current_rowData = []
-            current_rowData.append({
-                'transaction_id': '',
-                'client_name': '',
-                'principal_amount': '',
-                'tax_code_section': '',
-                'date_of_transaction': '',
-                'date_of_tax_deduction': '',
-                'date_of_tax_payment': ''
-            })
-            return current_rowData, error_msg
-    return current_rowData, error_msg
+            append_transactions([pd.DataFrame([dict.fromkeys(TRANSACTION_COLUMNS, '')])])
+            return (version or 0) + 1, error_msg
+    return dash.no_update, error_msg
+
+# Drop the grid's cached blocks so it re-requests rows (and the new row count) from the server
+app.clientside_callback(
+    """
+    function(version) {
+        const api = dash_ag_grid.getApi('transactions-table');
+        if (api) {
+            api.purgeInfiniteCache();
+        }
+    }
+    """,
+    Input('transactions-version', 'data'),
+    prevent_initial_call=True
+)
 
 @app.callback(
     Output('report-table', 'data'),
@@ -292,67 +565,18 @@ def update_transactions_table(upload_contents, add_row_clicks, upload_filename,
     prevent_initial_call=True
 )
 def update_report_table(start_date, end_date, period):
-    df = load_transactions()
+    key = (start_date, end_date, period, _mtime(transactions_file))
+    if key in _report_cache:
+        return _report_cache[key]
+    df = load_transaction_report()
     # Filter by date range
     if start_date and end_date:
         df = df[(df['date_of_transaction'] >= start_date) & (df['date_of_transaction'] <= end_date)]
-    # Add TDS and interest calculations
-    def calc_tds(row):
-        rate = SECTION_MAP.get(str(row['tax_code_section']).strip(), 0)
-        return float(row['principal_amount']) * rate
-    def calc_interest(row):
-        from datetime import datetime
-        def to_date(s):
-            try:
-                return datetime.strptime(str(s)[:10], '%Y-%m-%d')
-            except:
-                return None
-        dt_trans = to_date(row['date_of_transaction'])
-        dt_deduct = to_date(row['date_of_tax_deduction'])
-        dt_pay = to_date(row['date_of_tax_payment'])
-        if not (dt_trans and dt_deduct and dt_pay):
-            return 0.0
-        principal = float(row['principal_amount'])
-        section = str(row['tax_code_section']).strip()
-        tds = principal * SECTION_MAP.get(section, 0)
-        # Deadline: 7th of next month after transaction
-        deadline_month = dt_trans.month + 1 if dt_trans.month < 12 else 1
-        deadline_year = dt_trans.year if dt_trans.month < 12 else dt_trans.year + 1
-        deadline_day = 7
-        deadline = datetime(deadline_year, deadline_month, deadline_day)
-        if dt_pay <= deadline:
-            return 0.0
-        # Special case: year-end deduction
-        is_year_end = dt_deduct.month == 3 and dt_deduct.day == 31
-        if is_year_end:
-            dt_deduct = datetime(dt_deduct.year + 1, 4, 1)
-            # If paid before Apr 30, April interest is waived
-            if dt_pay <= datetime(dt_deduct.year, 4, 30):
-                months_1 = 2  # Feb, Mar at 1%
-                interest = tds * 0.01 * months_1
-                return round(interest, 2)
-            else:
-                # Feb, Mar at 1%, Apr+ at 1.5%
-                months_1 = 2
-                months_15 = (dt_pay.year - dt_deduct.year) * 12 + (dt_pay.month - 4) + 1
-                interest = tds * 0.01 * months_1 + tds * 0.015 * months_15
-                return round(interest, 2)
-        # General case
-        # Months at 1%: from transaction month to month before deduction
-        months_1 = (dt_deduct.year - dt_trans.year) * 12 + (dt_deduct.month - dt_trans.month)
-        if months_1 < 0:
-            months_1 = 0
-        # Months at 1.5%: from deduction month to payment month
-        months_15 = (dt_pay.year - dt_deduct.year) * 12 + (dt_pay.month - dt_deduct.month) + 1
-        if months_15 < 0:
-            months_15 = 0
-        interest = tds * 0.01 * months_1 + tds * 0.015 * months_15
-        return round(interest, 2)
-    df['TDS'] = df.apply(calc_tds, axis=1)
-    df['Interest'] = df.apply(calc_interest, axis=1)
-    df['Total Payment'] = df['TDS'] + df['Interest']
     columns = [{'name': col, 'id': col} for col in df.columns]
-    return df.to_dict('records'), columns
+    # One entry: each holds a full copy of the report as Python records
+    _report_cache.clear()
+    _report_cache[key] = (df.to_dict('records'), columns)
+    return _report_cache[key]
 
 @app.callback(
     Output('download-link', 'href'),
@@ -361,27 +585,52 @@ def update_report_table(start_date, end_date, period):
     prevent_initial_call=True
 )
 def export_transactions(n):
-    df = load_transactions()
-    csv_string = df.to_csv(index=False, encoding='utf-8')
-    href = 'data:text/csv;charset=utf-8,' + base64.b64encode(csv_string.encode()).decode()
-    return href, {'display': 'block'}
+    return app.get_relative_path('/download/transactions.csv'), {'display': 'block'}
+
+@app.server.route('/download/transactions.csv')
+def download_transactions():
+    _migrate_transactions_csv()
+    # Opened up front so a save during the download keeps streaming the file it started on
+    source = pq.ParquetFile(transactions_file) if os.path.exists(transactions_file) else None
+    def generate():
+        yield ','.join(TRANSACTION_COLUMNS) + '\n'
+        if source is not None:
+            for batch in source.iter_batches(batch_size=EXPORT_CHUNK_SIZE):
+                yield batch.to_pandas(ignore_metadata=True).to_csv(index=False, header=False, lineterminator='\n')
+    return Response(generate(), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=transactions.csv'})
 
 # --- TRANSACTIONS TAB CALLBACKS ---
 @app.callback(
+    Output('transactions-edits', 'data'),
     Output('transactions-save-status', 'children'),
+    Input('transactions-table', 'cellValueChanged'),
     Input('save-transactions', 'n_clicks'),
-    State('transactions-table', 'rowData'),
+    Input('transactions-version', 'data'),
+    State('transactions-edits', 'data'),
     prevent_initial_call=True
 )
-def save_transactions_callback(n_clicks, rowData):
-    if rowData is None:
-        return 'No data to save.'
+def save_transactions_callback(changed, n_clicks, version, edits):
+    ctx = callback_context
+    edits = edits or {}
+    trigger = ctx.triggered[0]['prop_id'].split('.')[0]
+    if trigger == 'transactions-table':
+        # Older dash-ag-grid releases send a single event instead of a list
+        events = changed if isinstance(changed, list) else [changed]
+        for event in events:
+            if event:
+                edits.setdefault(str(event['rowIndex']), {})[event['colId']] = event['value']
+        return edits, ''
+    if trigger == 'transactions-version':
+        # update_transactions_table saved pending edits before bumping the version
+        return {}, 'Transactions saved successfully.' if edits else ''
+    if not edits:
+        return edits, 'No data to save.'
     try:
-        df = pd.DataFrame(rowData)
-        save_transactions(df)
-        return 'Transactions saved successfully.'
+        apply_transaction_edits(edits)
+        return {}, 'Transactions saved successfully.'
     except Exception as e:
-        return f'Error saving transactions: {e}'
+        return edits, f'Error saving transactions: {e}'
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=not IS_PROD)
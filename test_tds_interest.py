@@ -1,6 +1,11 @@
 import unittest
+from unittest import mock
 from datetime import datetime
 import json
+import os
+import shutil
+import tempfile
+import threading
 
 # Load section mapping
 with open('data/sections.json', 'r') as f:
@@ -132,5 +137,184 @@ class TestTDSInterest(unittest.TestCase):
         }
         self.assertEqual(calc_interest(row), 0.0)
 
+    def test_vectorized_matches_row_wise(self):
+        import pandas as pd
+        from app import calc_tds_interest
+        rows = []
+        for trans, deduct, pay in [
+            ('2025-02-10', '2025-02-25', '2025-03-07'),
+            ('2025-02-10', '2025-02-25', '2025-03-08'),
+            ('2025-02-10', '2025-03-01', '2025-04-01'),
+            ('2025-02-10', '2025-03-31', '2025-04-30'),
+            ('2025-02-10', '2025-03-31', '2026-06-01'),
+            ('2025-01-10', '2025-03-10', '2025-05-10'),
+            ('2025-12-15', '2025-12-20', '2026-01-08'),
+            ('2025-01-10', '2024-12-10', '2024-11-10'),
+            ('', '', ''),
+        ]:
+            for section, principal in [('94A', 150000.00), (' 94C ', 150000.00), ('XYZ', 150000.00),
+                                       ('94A', 42.0), ('94C', 26.25), ('94A', 2499999.75), ('94C', 4999.99), ('94C', 2250.0)]:
+                rows.append({
+                    'principal_amount': principal,
+                    'tax_code_section': section,
+                    'date_of_transaction': trans,
+                    'date_of_tax_deduction': deduct,
+                    'date_of_tax_payment': pay
+                })
+        tds, interest = calc_tds_interest(pd.DataFrame(rows))
+        for row, value in zip(rows, interest):
+            self.assertEqual(value, calc_interest(row))
+
+HEADER = 'transaction_id,client_name,principal_amount,tax_code_section,date_of_transaction,date_of_tax_deduction,date_of_tax_payment\n'
+
+class TestTransactionStore(unittest.TestCase):
+    def setUp(self):
+        import app
+        self.app = app
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        for name, filename in [('clients_file', 'clients.parquet'), ('clients_csv', 'clients.csv'),
+                               ('transactions_file', 'transactions.parquet'), ('transactions_csv', 'transactions.csv')]:
+            patcher = mock.patch.object(app, name, os.path.join(self.data_dir, filename))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        app._file_cache.clear()
+        self.addCleanup(app._file_cache.clear)
+        app._report_cache.clear()
+        self.addCleanup(app._report_cache.clear)
+
+    def write_legacy_csv(self, text):
+        with open(self.app.transactions_csv, 'w') as f:
+            f.write(text)
+
+    def test_migration_keeps_iso_date_strings(self):
+        self.write_legacy_csv(HEADER + 't1,A,250000,94C,2025-01-01,2025-01-25,2025-02-07\n')
+        row = self.app.load_transactions().iloc[0]
+        self.assertTrue(os.path.exists(self.app.transactions_file))
+        self.assertEqual(row['transaction_id'], 't1')
+        self.assertEqual(row['principal_amount'], 250000.0)
+        self.assertEqual(row['date_of_transaction'], '2025-01-01')
+        self.assertEqual(row['date_of_tax_deduction'], '2025-01-25')
+        self.assertEqual(row['date_of_tax_payment'], '2025-02-07')
+
+    def test_failed_upload_leaves_store_untouched(self):
+        self.write_legacy_csv(HEADER + 't1,A,100,94A,2025-01-01,2025-01-02,2025-01-03\n')
+        before = self.app.load_transactions()
+        upload = HEADER + 't2,A,200,94A,,,\nt3,A,abc,94A,,,\n'
+        # One row per chunk so the bad amount fails after a good chunk was already written
+        with mock.patch.object(self.app, 'UPLOAD_CHUNK_SIZE', 1):
+            error = self.app.import_transactions(upload.encode())
+        self.assertTrue(error.startswith('Error reading file'))
+        self.assertEqual(sorted(os.listdir(self.data_dir)), ['transactions.csv', 'transactions.parquet'])
+        self.assertTrue(self.app.load_transactions().equals(before))
+
+    def test_append_failure_before_writing_keeps_original_error(self):
+        with mock.patch.object(self.app.pq, 'ParquetWriter', side_effect=OSError('disk full')):
+            with self.assertRaisesRegex(OSError, 'disk full'):
+                self.app.append_transactions([self.app.pd.DataFrame([dict.fromkeys(self.app.TRANSACTION_COLUMNS, '')])])
+        self.assertEqual(os.listdir(self.data_dir), [])
+
+    def test_concurrent_appends_keep_every_row(self):
+        def add(i):
+            self.app.append_transactions([self.app.pd.DataFrame([dict(dict.fromkeys(self.app.TRANSACTION_COLUMNS, ''),
+                                                             transaction_id=f't{i}')])])
+        threads = [threading.Thread(target=add, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        df = self.app.load_transactions()
+        self.assertEqual(sorted(df['transaction_id']), sorted(f't{i}' for i in range(8)))
+        self.assertEqual(os.listdir(self.data_dir), ['transactions.parquet'])
+
+    def test_upload_skips_existing_transaction_ids(self):
+        self.write_legacy_csv(HEADER + '1,A,100,94A,,,\nt2,A,200,94A,,,\n')
+        upload = HEADER + '1,B,5,94C,,,\nt3,B,300,94C,,,\nt2,B,5,94C,,,\n'
+        with mock.patch.object(self.app, 'UPLOAD_CHUNK_SIZE', 2):
+            self.assertEqual(self.app.import_transactions(upload.encode()), '')
+        df = self.app.load_transactions()
+        self.assertEqual(list(df['transaction_id']), ['1', 't2', 't3'])
+        self.assertEqual(list(df['principal_amount']), [100.0, 200.0, 300.0])
+
+    def test_upload_dedup_ignores_chunk_boundaries(self):
+        upload = (HEADER + 't1,A,1,94A,,,\nt1,A,2,94A,,,\nt2,A,3,94A,,,\n'
+                  't1,A,4,94A,,,\n,A,5,94A,,,\n,A,6,94A,,,\n')
+        for chunk_size in (1, 2, 100):
+            with self.subTest(chunk_size=chunk_size):
+                self.app._invalidate(self.app.transactions_file)
+                if os.path.exists(self.app.transactions_file):
+                    os.remove(self.app.transactions_file)
+                with mock.patch.object(self.app, 'UPLOAD_CHUNK_SIZE', chunk_size):
+                    self.assertEqual(self.app.import_transactions(upload.encode()), '')
+                df = self.app.load_transactions()
+                self.assertEqual(list(df['principal_amount']), [1.0, 3.0, 5.0, 6.0])
+
+    def test_download_migrates_without_loading_frame(self):
+        self.write_legacy_csv(HEADER + 't1,A,100,94A,2024-05-01,,\n')
+        client = self.app.app.server.test_client()
+        response = client.get('/download/transactions.csv')
+        self.assertEqual(response.get_data(as_text=True), HEADER + 't1,A,100.0,94A,2024-05-01,,\n')
+        self.assertTrue(os.path.exists(self.app.transactions_file))
+        self.assertEqual(self.app._file_cache, {})
+        # Appended rows are written by a different path but must export in the same format
+        self.assertEqual(self.app.import_transactions((HEADER + 't2,B,200,94C,,,\n').encode()), '')
+        response = client.get('/download/transactions.csv')
+        self.assertEqual(response.get_data(as_text=True),
+                         HEADER + 't1,A,100.0,94A,2024-05-01,,\nt2,B,200.0,94C,,,\n')
+
+    def test_export_link_respects_path_prefix(self):
+        with mock.patch.object(self.app.app, 'config', mock.Mock(requests_pathname_prefix='/tds/')):
+            href, style = self.app.export_transactions(1)
+        self.assertEqual(href, '/tds/download/transactions.csv')
+
+    def test_serve_transaction_rows_returns_requested_window(self):
+        self.write_legacy_csv(HEADER + ''.join(f't{i},A,{i},94A,,,\n' for i in range(5)))
+        response = self.app.serve_transaction_rows({'startRow': 1, 'endRow': 3})
+        self.assertEqual(response['rowCount'], 5)
+        self.assertEqual([row['transaction_id'] for row in response['rowData']], ['t1', 't2'])
+        response = self.app.serve_transaction_rows({'startRow': 4, 'endRow': 100})
+        self.assertEqual([row['transaction_id'] for row in response['rowData']], ['t4'])
+
+    def test_apply_transaction_edits_saves_changes(self):
+        self.write_legacy_csv(HEADER + 't1,A,100,94A,,,\nt2,A,200,94A,,,\n')
+        self.app.apply_transaction_edits({'1': {'principal_amount': '250', 'date_of_transaction': '2025-01-01'}})
+        df = self.app.load_transactions()
+        self.assertEqual(list(df['principal_amount']), [100.0, 250.0])
+        self.assertEqual(df.loc[1, 'date_of_transaction'], '2025-01-01')
+
+    def test_apply_transaction_edits_rejects_stale_rows(self):
+        self.write_legacy_csv(HEADER + 't1,A,100,94A,,,\n')
+        before = self.app.load_transactions()
+        with self.assertRaises(IndexError):
+            self.app.apply_transaction_edits({'1': {'principal_amount': '250'}})
+        self.assertTrue(self.app.load_transactions().equals(before))
+
+    def test_add_row_saves_pending_edits(self):
+        self.write_legacy_csv(HEADER + 't1,A,100,94A,,,\n')
+        ctx = mock.Mock(triggered=[{'prop_id': 'add-transaction-row.n_clicks'}])
+        with mock.patch.object(self.app, 'callback_context', ctx):
+            version, error = self.app.update_transactions_table(None, 1, None, 3, {'0': {'client_name': 'B'}})
+        self.assertEqual((version, error), (4, ''))
+        df = self.app.load_transactions()
+        self.assertEqual(list(df['client_name']), ['B', ''])
+        ctx = mock.Mock(triggered=[{'prop_id': 'transactions-version.data'}])
+        with mock.patch.object(self.app, 'callback_context', ctx):
+            edits, status = self.app.save_transactions_callback(None, None, 4, {'0': {'client_name': 'B'}})
+        self.assertEqual((edits, status), ({}, 'Transactions saved successfully.'))
+
+    def test_report_cache_is_cleared_on_save(self):
+        self.write_legacy_csv(HEADER + 't1,A,100,94A,,,\n')
+        records, columns = self.app.update_report_table(None, None, None)
+        self.assertEqual(records[0]['TDS'], 10.0)
+        df = self.app.load_transactions()
+        df.loc[0, 'principal_amount'] = 200.0
+        # Same mtime on a coarse-timestamp filesystem must not serve the old report
+        with mock.patch.object(self.app, '_mtime', return_value=0):
+            self.app.update_report_table(None, None, None)
+            self.app.save_transactions(df)
+            records, columns = self.app.update_report_table(None, None, None)
+        self.assertEqual(records[0]['TDS'], 20.0)
+        self.assertEqual(len(self.app._report_cache), 1)
+
 if __name__ == '__main__':
     unittest.main()